@@ -137,7 +137,7 @@ async function loadAlerts() {
         Authorization: `Bearer ${import.meta.env.VITE_SUPABASE_ANON_KEY}`,
         "Content-Type": "application/json",
       },
-      cache: "no-store",
+      cache: "no-cache",
     });
     if (!res.ok) throw new Error(`请求失败 ${res.status}`);
     const data = await res.json();
@@ -16,7 +16,7 @@ async function fetchJson(path, timeoutMs = 12000) {
   try {
     const res = await fetch(`${BASE}${path}`, {
       headers: authHeaders,
-      cache: "no-store",
+      cache: "no-cache",
       signal: controller.signal,
     });
     if (!res.ok) throw new Error(`请求失败 ${res.status}: ${path}`);
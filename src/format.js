@@ -12,11 +12,21 @@ export function formatSignedPercent(value) {
   return `${sign}${Number(value).toFixed(2)}%`;
 }
 
+// toLocaleString is slow and the alert list re-formats the same timestamps on every
+// filter change, so formatted strings are memoized (cleared wholesale when full).
+const TIME_CACHE_MAX = 4096;
+const timeCache = new Map();
+
 export function formatTime(ts) {
   if (!ts) return "-";
-  const d = new Date(ts);
-  if (Number.isNaN(d.getTime())) return ts;
-  return d.toLocaleString("zh-CN", { hour12: false });
+  let out = timeCache.get(ts);
+  if (out === undefined) {
+    const d = new Date(ts);
+    out = Number.isNaN(d.getTime()) ? ts : d.toLocaleString("zh-CN", { hour12: false });
+    if (timeCache.size >= TIME_CACHE_MAX) timeCache.clear();
+    timeCache.set(ts, out);
+  }
+  return out;
 }
 
 export function secondsFromNow(ts) {
@@ -55,11 +65,9 @@ export function getRatioClass(value) {
   return "ratio-bad";
 }
 
+const HTML_ESCAPES = { "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;" };
+const HTML_ESCAPE_RE = /[&<>"']/g;
+
 export function escapeHtml(raw) {
-  return String(raw ?? "")
-    .replaceAll("&", "&amp;")
-    .replaceAll("<", "&lt;")
-    .replaceAll(">", "&gt;")
-    .replaceAll('"', "&quot;")
-    .replaceAll("'", "&#39;");
+  return String(raw ?? "").replace(HTML_ESCAPE_RE, (ch) => HTML_ESCAPES[ch]);
 }
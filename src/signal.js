@@ -259,6 +259,7 @@ function classifySignal(price, oi, exec) {
 export function computeSignals(history, overviewVenues) {
   const byVenue = history?.by_venue || {};
   const venues = Object.keys(byVenue);
+  const metaByVenue = new Map((overviewVenues ?? []).map((v) => [v.venue, v]));
 
   return venues.map((venue) => {
     const points = byVenue[venue] || [];
@@ -270,7 +271,7 @@ export function computeSignals(history, overviewVenues) {
       };
     }
 
-    const venueMeta = overviewVenues?.find((v) => v.venue === venue) ?? null;
+    const venueMeta = metaByVenue.get(venue) ?? null;
     const price = priceBreakout(venue, points);
     const oi = oiCrowding(venue, points);
     const exec = executionQuality(venue, points, venueMeta);
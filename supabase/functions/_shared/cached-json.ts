@@ -0,0 +1,55 @@
+// Bodies below this size are not worth the gzip framing overhead.
+const GZIP_MIN_BYTES = 1024;
+
+const encoder = new TextEncoder();
+
+// Responses carry a content hash so browsers revalidate with If-None-Match and get
+// a bodyless 304 when nothing changed. no-cache keeps every poll a revalidation.
+async function etagFor(bytes: Uint8Array, suffix: string): Promise<string> {
+  const digest = await crypto.subtle.digest("SHA-1", bytes);
+  const hex = Array.from(new Uint8Array(digest).slice(0, 8), (b) => b.toString(16).padStart(2, "0")).join("");
+  return `"${hex}${suffix}"`;
+}
+
+// If-None-Match uses weak comparison (RFC 9110 §13.1.2): the header may list several
+// tags or be "*", and a compressing proxy may have turned ours into W/"...".
+function etagMatches(header: string | null, etag: string): boolean {
+  if (!header) return false;
+  if (header.trim() === "*") return true;
+  return header.split(",").some((tag) => tag.trim().replace(/^W\//, "") === etag);
+}
+
+// Whether Accept-Encoding allows gzip, honouring q-values: "gzip;q=0" is a refusal, and
+// an explicit gzip entry takes precedence over "*".
+function acceptsGzip(header: string | null): boolean {
+  let wildcard = false;
+  for (const part of (header ?? "").split(",")) {
+    const [coding, ...params] = part.split(";").map((s) => s.trim().toLowerCase());
+    const qParam = params.find((p) => p.startsWith("q="));
+    const q = qParam ? Number(qParam.slice(2)) : 1;
+    const allowed = q > 0;
+    if (coding === "gzip" || coding === "x-gzip") return allowed;
+    if (coding === "*") wildcard = allowed;
+  }
+  return wildcard;
+}
+
+export async function cachedJson(
+  req: Request,
+  body: string,
+  corsHeaders: Record<string, string>,
+): Promise<Response> {
+  const bytes = encoder.encode(body);
+  const gzip = bytes.byteLength >= GZIP_MIN_BYTES && acceptsGzip(req.headers.get("Accept-Encoding"));
+  const etag = await etagFor(bytes, gzip ? "-gz" : "");
+  const headers = { ...corsHeaders, ETag: etag, "Cache-Control": "no-cache", Vary: "Accept-Encoding" };
+  if (etagMatches(req.headers.get("If-None-Match"), etag)) {
+    return new Response(null, { status: 304, headers });
+  }
+  const jsonHeaders = { ...headers, "Content-Type": "application/json" };
+  if (!gzip) {
+    return new Response(bytes, { headers: jsonHeaders });
+  }
+  const stream = new Blob([bytes]).stream().pipeThrough(new CompressionStream("gzip"));
+  return new Response(stream, { headers: { ...jsonHeaders, "Content-Encoding": "gzip" } });
+}
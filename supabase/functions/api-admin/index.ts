@@ -6,19 +6,27 @@ const corsHeaders = {
   "Access-Control-Allow-Headers": "Content-Type, Authorization, X-Client-Info, Apikey",
 };
 
+const jsonHeaders = { ...corsHeaders, "Content-Type": "application/json" };
+
+const supabase = createClient(
+  Deno.env.get("SUPABASE_URL")!,
+  Deno.env.get("SUPABASE_SERVICE_ROLE_KEY")!
+);
+
+const ADMIN_PREFIX_RE = /^\/api-admin/;
+const TOKEN_ID_PATH_RE = /^\/tokens\/(\d+)$/;
+
+const TOKEN_REQUIRED_BODY = JSON.stringify({ error: "token is required" });
+const NOT_FOUND_BODY = JSON.stringify({ error: "not found" });
+
 Deno.serve(async (req: Request) => {
   if (req.method === "OPTIONS") {
     return new Response(null, { status: 200, headers: corsHeaders });
   }
 
   try {
-    const supabase = createClient(
-      Deno.env.get("SUPABASE_URL")!,
-      Deno.env.get("SUPABASE_SERVICE_ROLE_KEY")!
-    );
-
     const url = new URL(req.url);
-    const path = url.pathname.replace(/^\/api-admin/, "");
+    const path = url.pathname.replace(ADMIN_PREFIX_RE, "");
 
     if (path === "/tokens" || path === "/tokens/") {
       if (req.method === "GET") {
@@ -29,7 +37,7 @@ Deno.serve(async (req: Request) => {
 
         if (error) throw error;
         return new Response(JSON.stringify({ tokens: data ?? [] }), {
-          headers: { ...corsHeaders, "Content-Type": "application/json" },
+          headers: jsonHeaders,
         });
       }
 
@@ -37,9 +45,9 @@ Deno.serve(async (req: Request) => {
         const body = await req.json();
         const { token, enabled, binance_symbol, okx_inst_id, bybit_symbol, note } = body;
         if (!token) {
-          return new Response(JSON.stringify({ error: "token is required" }), {
+          return new Response(TOKEN_REQUIRED_BODY, {
             status: 400,
-            headers: { ...corsHeaders, "Content-Type": "application/json" },
+            headers: jsonHeaders,
           });
         }
 
@@ -60,12 +68,12 @@ Deno.serve(async (req: Request) => {
         if (error) throw error;
         return new Response(JSON.stringify({ token: data }), {
           status: 201,
-          headers: { ...corsHeaders, "Content-Type": "application/json" },
+          headers: jsonHeaders,
         });
       }
     }
 
-    const tokenMatch = path.match(/^\/tokens\/(\d+)$/);
+    const tokenMatch = path.match(TOKEN_ID_PATH_RE);
     if (tokenMatch) {
       const id = Number(tokenMatch[1]);
 
@@ -89,7 +97,7 @@ Deno.serve(async (req: Request) => {
 
         if (error) throw error;
         return new Response(JSON.stringify({ token: data }), {
-          headers: { ...corsHeaders, "Content-Type": "application/json" },
+          headers: jsonHeaders,
         });
       }
 
@@ -97,43 +105,43 @@ Deno.serve(async (req: Request) => {
         const { error } = await supabase.from("tokens").delete().eq("id", id);
         if (error) throw error;
         return new Response(JSON.stringify({ ok: true }), {
-          headers: { ...corsHeaders, "Content-Type": "application/json" },
+          headers: jsonHeaders,
         });
       }
     }
 
     if (path === "/collector/status" && req.method === "GET") {
-      const { data: state } = await supabase.from("runtime_state").select("*");
+      const [{ data: state }, { count: snapshotCount }, { count: alertCount }] = await Promise.all([
+        supabase.from("runtime_state").select("key, value"),
+        supabase
+          .from("metrics_snapshot")
+          .select("id", { count: "exact", head: true }),
+        supabase
+          .from("alerts")
+          .select("id", { count: "exact", head: true })
+          .gte("ts_utc", new Date(Date.now() - 86400_000).toISOString()),
+      ]);
       const stateMap: Record<string, string> = {};
       for (const row of state ?? []) stateMap[row.key] = row.value;
 
-      const { count: snapshotCount } = await supabase
-        .from("metrics_snapshot")
-        .select("id", { count: "exact", head: true });
-
-      const { count: alertCount } = await supabase
-        .from("alerts")
-        .select("id", { count: "exact", head: true })
-        .gte("ts_utc", new Date(Date.now() - 86400_000).toISOString());
-
       return new Response(
         JSON.stringify({
           state: stateMap,
           total_snapshots: snapshotCount ?? 0,
           alerts_24h: alertCount ?? 0,
         }),
-        { headers: { ...corsHeaders, "Content-Type": "application/json" } }
+        { headers: jsonHeaders }
       );
     }
 
-    return new Response(JSON.stringify({ error: "not found" }), {
+    return new Response(NOT_FOUND_BODY, {
       status: 404,
-      headers: { ...corsHeaders, "Content-Type": "application/json" },
+      headers: jsonHeaders,
     });
   } catch (e) {
     return new Response(JSON.stringify({ error: String(e) }), {
       status: 500,
-      headers: { ...corsHeaders, "Content-Type": "application/json" },
+      headers: jsonHeaders,
     });
   }
 });
@@ -1,4 +1,5 @@
 import { createClient } from "npm:@supabase/supabase-js@2";
+import { cachedJson } from "../_shared/cached-json.ts";
 
 const corsHeaders = {
   "Access-Control-Allow-Origin": "*",
@@ -6,17 +7,19 @@ const corsHeaders = {
   "Access-Control-Allow-Headers": "Content-Type, Authorization, X-Client-Info, Apikey",
 };
 
+const jsonHeaders = { ...corsHeaders, "Content-Type": "application/json" };
+
+const supabase = createClient(
+  Deno.env.get("SUPABASE_URL")!,
+  Deno.env.get("SUPABASE_SERVICE_ROLE_KEY")!
+);
+
 Deno.serve(async (req: Request) => {
   if (req.method === "OPTIONS") {
     return new Response(null, { status: 200, headers: corsHeaders });
   }
 
   try {
-    const supabase = createClient(
-      Deno.env.get("SUPABASE_URL")!,
-      Deno.env.get("SUPABASE_SERVICE_ROLE_KEY")!
-    );
-
     const url = new URL(req.url);
     const limit = Math.min(Number(url.searchParams.get("limit") ?? "50"), 200);
 
@@ -26,14 +29,11 @@ Deno.serve(async (req: Request) => {
       .order("ts_utc", { ascending: false })
       .limit(limit);
 
-    return new Response(
-      JSON.stringify({ items: data ?? [] }),
-      { headers: { ...corsHeaders, "Content-Type": "application/json" } }
-    );
+    return await cachedJson(req, JSON.stringify({ items: data ?? [] }), corsHeaders);
   } catch (e) {
     return new Response(
       JSON.stringify({ error: String(e) }),
-      { status: 500, headers: { ...corsHeaders, "Content-Type": "application/json" } }
+      { status: 500, headers: jsonHeaders }
     );
   }
 });
@@ -1,4 +1,5 @@
 import { createClient } from "npm:@supabase/supabase-js@2";
+import { cachedJson } from "../_shared/cached-json.ts";
 
 const corsHeaders = {
   "Access-Control-Allow-Origin": "*",
@@ -6,17 +7,19 @@ const corsHeaders = {
   "Access-Control-Allow-Headers": "Content-Type, Authorization, X-Client-Info, Apikey",
 };
 
+const jsonHeaders = { ...corsHeaders, "Content-Type": "application/json" };
+
+const supabase = createClient(
+  Deno.env.get("SUPABASE_URL")!,
+  Deno.env.get("SUPABASE_SERVICE_ROLE_KEY")!
+);
+
 Deno.serve(async (req: Request) => {
   if (req.method === "OPTIONS") {
     return new Response(null, { status: 200, headers: corsHeaders });
   }
 
   try {
-    const supabase = createClient(
-      Deno.env.get("SUPABASE_URL")!,
-      Deno.env.get("SUPABASE_SERVICE_ROLE_KEY")!
-    );
-
     const url = new URL(req.url);
     const limit = Math.min(Number(url.searchParams.get("limit") ?? "120"), 500);
     const tokenParam = (url.searchParams.get("token") ?? "MON").toUpperCase().trim();
@@ -28,7 +31,7 @@ Deno.serve(async (req: Request) => {
       venues.map(async (venue) => {
         const { data } = await supabase
           .from("metrics_snapshot")
-          .select("ts_utc, last_price, spread_bps, depth_1pct_total_usdt, quote_volume_24h, funding_rate, open_interest_usd, slip_bps_n2")
+          .select("ts_utc, last_price, spread_bps, depth_1pct_total_usdt, funding_rate, open_interest_usd, slip_bps_n2")
           .eq("venue", venue)
           .eq("token", tokenParam)
           .is("error_type", null)
@@ -39,14 +42,11 @@ Deno.serve(async (req: Request) => {
       })
     );
 
-    return new Response(
-      JSON.stringify({ by_venue: byVenue }),
-      { headers: { ...corsHeaders, "Content-Type": "application/json" } }
-    );
+    return await cachedJson(req, JSON.stringify({ by_venue: byVenue }), corsHeaders);
   } catch (e) {
     return new Response(
       JSON.stringify({ error: String(e) }),
-      { status: 500, headers: { ...corsHeaders, "Content-Type": "application/json" } }
+      { status: 500, headers: jsonHeaders }
     );
   }
 });
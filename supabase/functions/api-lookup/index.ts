@@ -6,6 +6,10 @@ const corsHeaders = {
   "Access-Control-Allow-Headers": "Content-Type, Authorization, X-Client-Info, Apikey",
 };
 
+const jsonHeaders = { ...corsHeaders, "Content-Type": "application/json" };
+
+const TOKEN_REQUIRED_BODY = JSON.stringify({ error: "token parameter is required" });
+
 async function lookupBinance(token: string): Promise<string | null> {
   try {
     const candidates = [
@@ -82,8 +86,8 @@ Deno.serve(async (req: Request) => {
 
     if (!token || token.trim().length === 0) {
       return new Response(
-        JSON.stringify({ error: "token parameter is required" }),
-        { status: 400, headers: { ...corsHeaders, "Content-Type": "application/json" } }
+        TOKEN_REQUIRED_BODY,
+        { status: 400, headers: jsonHeaders }
       );
     }
 
@@ -95,12 +99,12 @@ Deno.serve(async (req: Request) => {
 
     return new Response(
       JSON.stringify({ binance, okx, bybit }),
-      { headers: { ...corsHeaders, "Content-Type": "application/json" } }
+      { headers: jsonHeaders }
     );
   } catch (e) {
     return new Response(
       JSON.stringify({ error: String(e) }),
-      { status: 500, headers: { ...corsHeaders, "Content-Type": "application/json" } }
+      { status: 500, headers: jsonHeaders }
     );
   }
 });
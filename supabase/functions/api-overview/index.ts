@@ -6,96 +6,126 @@ const corsHeaders = {
   "Access-Control-Allow-Headers": "Content-Type, Authorization, X-Client-Info, Apikey",
 };
 
+const jsonHeaders = { ...corsHeaders, "Content-Type": "application/json" };
+
+const supabase = createClient(
+  Deno.env.get("SUPABASE_URL")!,
+  Deno.env.get("SUPABASE_SERVICE_ROLE_KEY")!
+);
+
+// Only the columns the overview payload reads; raw_json in particular is never sent.
+const OVERVIEW_SNAPSHOT_COLUMNS =
+  "symbol, ts_utc, last_price, pct_change_1h, quote_volume_24h, spread_bps, " +
+  "depth_1pct_total_usdt, slip_bps_n2, funding_rate, open_interest_usd, error_type";
+
+// runtime_state keys the collector block is built from.
+const COLLECTOR_STATE_KEYS = [
+  "service_status", "last_cycle_start_utc", "last_cycle_end_utc",
+  "last_success_utc", "venues_ok", "venues_total",
+];
+
 Deno.serve(async (req: Request) => {
   if (req.method === "OPTIONS") {
     return new Response(null, { status: 200, headers: corsHeaders });
   }
 
   try {
-    const supabase = createClient(
-      Deno.env.get("SUPABASE_URL")!,
-      Deno.env.get("SUPABASE_SERVICE_ROLE_KEY")!
-    );
-
     const url = new URL(req.url);
     const tokenParam = (url.searchParams.get("token") ?? "MON").toUpperCase().trim();
 
     const venues = ["binance", "okx", "bybit"];
-
-    const venueRows = await Promise.all(
-      venues.map(async (venue) => {
-        const { data } = await supabase
-          .from("metrics_snapshot")
-          .select("*")
-          .eq("venue", venue)
-          .eq("token", tokenParam)
-          .order("ts_utc", { ascending: false })
-          .limit(1)
-          .maybeSingle();
-
-        const { data: bl } = await supabase
-          .from("baselines")
-          .select("*")
-          .eq("venue", venue)
-          .maybeSingle();
-
-        if (!data) {
-          return { venue, symbol: "-", status: "down", error_reason: "no_data" };
-        }
-
-        const snapshotAge = data.ts_utc
-          ? Math.floor((Date.now() - new Date(data.ts_utc).getTime()) / 1000)
+    // One clock reading per request so every age in the payload is measured from the same instant.
+    const now = Date.now();
+
+    // The overview reads below are independent, so they are issued together.
+    const oneDay = new Date(now - 86400_000).toISOString();
+    const [
+      { data: baselineRows },
+      snapshots,
+      { data: stateRows },
+      { count: alerts24h },
+      { count: critical24h },
+    ] = await Promise.all([
+      supabase
+        .from("baselines")
+        .select("venue, median_depth_total")
+        .in("venue", venues),
+      Promise.all(
+        venues.map((venue) =>
+          supabase
+            .from("metrics_snapshot")
+            .select(OVERVIEW_SNAPSHOT_COLUMNS)
+            .eq("venue", venue)
+            .eq("token", tokenParam)
+            .order("ts_utc", { ascending: false })
+            .limit(1)
+            .maybeSingle()
+        )
+      ),
+      supabase
+        .from("runtime_state")
+        .select("key, value")
+        .in("key", COLLECTOR_STATE_KEYS),
+      supabase
+        .from("alerts")
+        .select("id", { count: "exact", head: true })
+        .gte("ts_utc", oneDay),
+      supabase
+        .from("alerts")
+        .select("id", { count: "exact", head: true })
+        .eq("severity", "critical")
+        .gte("ts_utc", oneDay),
+    ]);
+    const baselineByVenue = new Map((baselineRows ?? []).map((b) => [b.venue, b]));
+
+    const venueRows = venues.map((venue, i) => {
+      const data = snapshots[i].data;
+      const bl = baselineByVenue.get(venue);
+
+      if (!data) {
+        return { venue, symbol: "-", status: "down", error_reason: "no_data" };
+      }
+
+      const snapshotAge = data.ts_utc
+        ? Math.floor((now - new Date(data.ts_utc).getTime()) / 1000)
+        : null;
+
+      let status = "ok";
+      if (data.error_type) status = "down";
+      else if (snapshotAge !== null && snapshotAge > 180) status = "stale";
+
+      const depthRatio =
+        bl?.median_depth_total && data.depth_1pct_total_usdt
+          ? data.depth_1pct_total_usdt / bl.median_depth_total
           : null;
 
-        let status = "ok";
-        if (data.error_type) status = "down";
-        else if (snapshotAge !== null && snapshotAge > 180) status = "stale";
-
-        const depthRatio =
-          bl?.median_depth_total && data.depth_1pct_total_usdt
-            ? data.depth_1pct_total_usdt / bl.median_depth_total
-            : null;
-
-        return {
-          venue,
-          symbol: data.symbol ?? "-",
-          status,
-          last_price: data.last_price,
-          pct_change_1h: data.pct_change_1h,
-          quote_volume_24h: data.quote_volume_24h,
-          spread_bps: data.spread_bps,
-          depth_1pct_total_usdt: data.depth_1pct_total_usdt,
-          slip_bps_n2: data.slip_bps_n2,
-          snapshot_ts_utc: data.ts_utc,
-          snapshot_age_seconds: snapshotAge,
-          last_success_ts_utc: data.error_type ? null : data.ts_utc,
-          data_lag_seconds: null,
-          error_reason: data.error_type ?? null,
-          funding_rate: data.funding_rate ?? null,
-          open_interest_usd: data.open_interest_usd ?? null,
-          ratios: { depth_vs_baseline: depthRatio },
-        };
-      })
-    );
+      return {
+        venue,
+        symbol: data.symbol ?? "-",
+        status,
+        last_price: data.last_price,
+        pct_change_1h: data.pct_change_1h,
+        quote_volume_24h: data.quote_volume_24h,
+        spread_bps: data.spread_bps,
+        depth_1pct_total_usdt: data.depth_1pct_total_usdt,
+        slip_bps_n2: data.slip_bps_n2,
+        snapshot_ts_utc: data.ts_utc,
+        snapshot_age_seconds: snapshotAge,
+        last_success_ts_utc: data.error_type ? null : data.ts_utc,
+        data_lag_seconds: null,
+        error_reason: data.error_type ?? null,
+        funding_rate: data.funding_rate ?? null,
+        open_interest_usd: data.open_interest_usd ?? null,
+        ratios: { depth_vs_baseline: depthRatio },
+      };
+    });
 
-    const { data: stateRows } = await supabase.from("runtime_state").select("*");
     const state: Record<string, string> = {};
     for (const r of stateRows ?? []) state[r.key] = r.value;
 
-    const oneDay = new Date(Date.now() - 86400_000).toISOString();
-    const { count: alerts24h } = await supabase
-      .from("alerts")
-      .select("id", { count: "exact", head: true })
-      .gte("ts_utc", oneDay);
-    const { count: critical24h } = await supabase
-      .from("alerts")
-      .select("id", { count: "exact", head: true })
-      .eq("severity", "critical")
-      .gte("ts_utc", oneDay);
-
     const lastEnd = state["last_cycle_end_utc"] || null;
     const lastSuccessAge = lastEnd
-      ? Math.floor((Date.now() - new Date(lastEnd).getTime()) / 1000)
+      ? Math.floor((now - new Date(lastEnd).getTime()) / 1000)
       : null;
 
     const collector = {
@@ -112,7 +142,7 @@ Deno.serve(async (req: Request) => {
       JSON.stringify({
         token_hint: tokenParam,
         db_path: "Supabase",
-        updated_at_utc: new Date().toISOString(),
+        updated_at_utc: new Date(now).toISOString(),
         collector,
         venues: venueRows,
         stats: {
@@ -121,12 +151,12 @@ Deno.serve(async (req: Request) => {
           critical_alerts_24h: critical24h ?? 0,
         },
       }),
-      { headers: { ...corsHeaders, "Content-Type": "application/json" } }
+      { headers: jsonHeaders }
     );
   } catch (e) {
     return new Response(
       JSON.stringify({ error: String(e) }),
-      { status: 500, headers: { ...corsHeaders, "Content-Type": "application/json" } }
+      { status: 500, headers: jsonHeaders }
     );
   }
 });
@@ -6,6 +6,8 @@ const corsHeaders = {
   "Access-Control-Allow-Headers": "Content-Type, Authorization, X-Client-Info, Apikey",
 };
 
+const jsonHeaders = { ...corsHeaders, "Content-Type": "application/json" };
+
 interface VenueResult {
   venue: string;
   symbol: string;
@@ -27,6 +29,14 @@ interface VenueResult {
   raw_json: Record<string, unknown> | null;
 }
 
+// Metric fields of a failed venue, shared by every collector's error path.
+const EMPTY_METRICS = Object.freeze({
+  last_price: null, pct_change_1h: null, quote_volume_24h: null,
+  spread_bps: null, depth_1pct_bid_usdt: null, depth_1pct_ask_usdt: null,
+  depth_1pct_total_usdt: null, slip_bps_n1: null, slip_bps_n2: null,
+  funding_rate: null, open_interest_usd: null, rvol_24h: null,
+});
+
 interface TokenConfig {
   id: number;
   token: string;
@@ -36,10 +46,29 @@ interface TokenConfig {
   bybit_symbol: string;
 }
 
+// One client per isolate, reused across warm invocations.
+const supabase = createClient(
+  Deno.env.get("SUPABASE_URL")!,
+  Deno.env.get("SUPABASE_SERVICE_ROLE_KEY")!
+);
+
 const NOTIONAL_N1 = 10_000;
 const NOTIONAL_N2 = 100_000;
 
+// Upper bound on everything one venue fetches in a cycle (host probes included), so a
+// stuck venue cannot stall the whole cycle. Each collectX creates one signal and passes
+// it to all of its requests.
+const VENUE_TIMEOUT_MS = 8_000;
+// A hung OKX host gives up after this long, leaving budget for the next host and the
+// market requests.
+const OKX_PROBE_TIMEOUT_MS = 2_000;
+
+function errorType(e: unknown): string {
+  return e instanceof DOMException && e.name === "TimeoutError" ? "timeout" : "fetch_error";
+}
+
 function safeNum(v: unknown): number | null {
+  if (typeof v === "number") return isFinite(v) ? v : null;
   if (v === null || v === undefined || v === "" || v === "NaN") return null;
   const n = Number(v);
   return isFinite(n) ? n : null;
@@ -50,92 +79,149 @@ function calcSpreadBps(bid: number, ask: number): number | null {
   return ((ask - bid) / bid) * 10000;
 }
 
+// Order book side parsed once into a flat [price0, qty0, price1, qty1, ...] buffer,
+// best level first. qtyMult converts contract sizes to base units (OKX ctVal).
+function parseLevels(raw: string[][] | undefined, qtyMult = 1): Float64Array {
+  const levels = raw ?? [];
+  const out = new Float64Array(levels.length * 2);
+  for (let i = 0; i < levels.length; i++) {
+    out[2 * i] = Number(levels[i][0]);
+    out[2 * i + 1] = Number(levels[i][1]) * qtyMult;
+  }
+  return out;
+}
+
 function calcDepth(
-  bids: [string, string][],
-  asks: [string, string][],
+  bids: Float64Array,
+  asks: Float64Array,
   midPrice: number,
   pct: number
 ): { bid: number; ask: number; total: number } {
   const lo = midPrice * (1 - pct / 100);
   const hi = midPrice * (1 + pct / 100);
+  // Levels are sorted best-first, so the scan stops at the first level outside the band.
   let bidDepth = 0;
-  for (const [p, q] of bids) {
-    const price = Number(p);
-    if (price >= lo) bidDepth += price * Number(q);
+  for (let i = 0; i < bids.length; i += 2) {
+    if (bids[i] < lo) break;
+    bidDepth += bids[i] * bids[i + 1];
   }
   let askDepth = 0;
-  for (const [p, q] of asks) {
-    const price = Number(p);
-    if (price <= hi) askDepth += price * Number(q);
+  for (let i = 0; i < asks.length; i += 2) {
+    if (asks[i] > hi) break;
+    askDepth += asks[i] * asks[i + 1];
   }
   return { bid: bidDepth, ask: askDepth, total: bidDepth + askDepth };
 }
 
-function calcImpactCost(
+// Impact cost for several ascending notionals from a single sweep of the book.
+function calcImpactCosts(
   side: "buy" | "sell",
-  levels: [string, string][],
-  notionalUsdt: number,
+  levels: Float64Array,
+  notionals: number[],
   midPrice: number
-): number | null {
-  if (!midPrice || midPrice <= 0) return null;
-  let remaining = notionalUsdt;
-  let totalCost = 0;
-  let totalBase = 0;
-  for (const [p, q] of levels) {
-    const price = Number(p);
-    const qty = Number(q);
+): (number | null)[] {
+  const out: (number | null)[] = notionals.map(() => null);
+  if (!midPrice || midPrice <= 0) return out;
+  let k = 0;
+  let filledNotional = 0;
+  let filledBase = 0;
+  for (let i = 0; i < levels.length && k < notionals.length; i += 2) {
+    const price = levels[i];
+    const qty = levels[i + 1];
     const val = price * qty;
-    if (remaining <= 0) break;
-    const fillNotional = Math.min(remaining, val);
-    const fillBase = fillNotional / price;
-    totalCost += fillNotional;
-    totalBase += fillBase;
-    remaining -= fillNotional;
+    while (k < notionals.length && filledNotional + val >= notionals[k]) {
+      const totalBase = filledBase + (notionals[k] - filledNotional) / price;
+      if (totalBase > 0) {
+        const avgPrice = notionals[k] / totalBase;
+        out[k] = side === "buy"
+          ? ((avgPrice - midPrice) / midPrice) * 10000
+          : ((midPrice - avgPrice) / midPrice) * 10000;
+      }
+      k++;
+    }
+    filledNotional += val;
+    filledBase += qty;
   }
-  if (remaining > 0) return null;
-  if (totalBase <= 0) return null;
-  const avgPrice = totalCost / totalBase;
-  if (side === "buy") return ((avgPrice - midPrice) / midPrice) * 10000;
-  return ((midPrice - avgPrice) / midPrice) * 10000;
+  return out;
+}
+
+interface BookMetrics {
+  depth_1pct_bid_usdt: number | null;
+  depth_1pct_ask_usdt: number | null;
+  depth_1pct_total_usdt: number | null;
+  slip_bps_n1: number | null;
+  slip_bps_n2: number | null;
 }
 
-function calcPctChange1hFromKlines(candles: [number, string, string, string, string, string][]): number | null {
-  if (!candles || candles.length < 2) return null;
-  const sorted = [...candles].sort((a, b) => a[0] - b[0]);
+const NO_BOOK_METRICS: BookMetrics = Object.freeze({
+  depth_1pct_bid_usdt: null, depth_1pct_ask_usdt: null, depth_1pct_total_usdt: null,
+  slip_bps_n1: null, slip_bps_n2: null,
+});
+
+function calcBookMetrics(bids: Float64Array, asks: Float64Array, mid: number): BookMetrics {
+  const d = calcDepth(bids, asks, mid, 1);
+  const [slipN1, slipN2] = calcImpactCosts("buy", asks, [NOTIONAL_N1, NOTIONAL_N2], mid);
+  return {
+    depth_1pct_bid_usdt: d.bid,
+    depth_1pct_ask_usdt: d.ask,
+    depth_1pct_total_usdt: d.total,
+    slip_bps_n1: slipN1,
+    slip_bps_n2: slipN2,
+  };
+}
+
+type Candle = [number, string, string, string, string, string];
+
+// Sort klines ascending by open time once per venue; the calc helpers below assume this order.
+function sortCandles(candles: Candle[] | null): Candle[] | null {
+  if (!candles) return null;
+  return [...candles].sort((a, b) => a[0] - b[0]);
+}
+
+function calcPctChange1hFromKlines(sorted: Candle[] | null): number | null {
+  if (!sorted || sorted.length < 2) return null;
   const current = safeNum(sorted[sorted.length - 1][4]);
   const prev = safeNum(sorted[sorted.length - 2][4]);
   if (current === null || prev === null || prev === 0) return null;
   return ((current - prev) / prev) * 100;
 }
 
-function calcRvol24h(candles: [number, string, string, string, string, string][]): number | null {
-  if (!candles || candles.length < 3) return null;
-  const sorted = [...candles].sort((a, b) => a[0] - b[0]);
-  const recent = sorted.slice(-25);
-  const closes = recent.map((c) => safeNum(c[4])).filter((v): v is number => v !== null);
-  if (closes.length < 3) return null;
-  const returns: number[] = [];
-  for (let i = 1; i < closes.length; i++) {
-    if (closes[i - 1] > 0 && closes[i] > 0) {
-      returns.push(Math.log(closes[i] / closes[i - 1]));
+function calcRvol24h(sorted: Candle[] | null): number | null {
+  if (!sorted || sorted.length < 3) return null;
+  // Single pass over the last 25 closes: Welford's running mean/variance of log returns.
+  let closeCount = 0;
+  let prevClose: number | null = null;
+  let n = 0;
+  let mean = 0;
+  let m2 = 0;
+  for (let i = Math.max(0, sorted.length - 25); i < sorted.length; i++) {
+    const close = safeNum(sorted[i][4]);
+    if (close === null) continue;
+    closeCount++;
+    if (prevClose !== null && prevClose > 0 && close > 0) {
+      const r = Math.log(close / prevClose);
+      n++;
+      const delta = r - mean;
+      mean += delta / n;
+      m2 += delta * (r - mean);
     }
+    prevClose = close;
   }
-  if (returns.length < 2) return null;
-  const mean = returns.reduce((a, b) => a + b, 0) / returns.length;
-  const variance = returns.reduce((s, r) => s + (r - mean) ** 2, 0) / (returns.length - 1);
-  return Math.sqrt(variance);
+  if (closeCount < 3 || n < 2) return null;
+  return Math.sqrt(m2 / (n - 1));
 }
 
 async function collectBinance(token: string, symbol: string): Promise<VenueResult> {
   const venue = "binance";
+  const signal = AbortSignal.timeout(VENUE_TIMEOUT_MS);
   try {
     const [tickerRes, bookRes, bookTickerRes, fundRes, oiRes, klinesRes] = await Promise.all([
-      fetch(`https://fapi.binance.com/fapi/v1/ticker/24hr?symbol=${symbol}`),
-      fetch(`https://fapi.binance.com/fapi/v1/depth?symbol=${symbol}&limit=500`),
-      fetch(`https://fapi.binance.com/fapi/v1/ticker/bookTicker?symbol=${symbol}`),
-      fetch(`https://fapi.binance.com/fapi/v1/fundingRate?symbol=${symbol}&limit=1`),
-      fetch(`https://fapi.binance.com/fapi/v1/openInterest?symbol=${symbol}`),
-      fetch(`https://fapi.binance.com/fapi/v1/klines?symbol=${symbol}&interval=1h&limit=26`),
+      fetch(`https://fapi.binance.com/fapi/v1/ticker/24hr?symbol=${symbol}`, { signal }),
+      fetch(`https://fapi.binance.com/fapi/v1/depth?symbol=${symbol}&limit=500`, { signal }),
+      fetch(`https://fapi.binance.com/fapi/v1/ticker/bookTicker?symbol=${symbol}`, { signal }),
+      fetch(`https://fapi.binance.com/fapi/v1/fundingRate?symbol=${symbol}&limit=1`, { signal }),
+      fetch(`https://fapi.binance.com/fapi/v1/openInterest?symbol=${symbol}`, { signal }),
+      fetch(`https://fapi.binance.com/fapi/v1/klines?symbol=${symbol}&interval=1h&limit=26`, { signal }),
     ]);
 
     if (!tickerRes.ok) {
@@ -158,25 +244,16 @@ async function collectBinance(token: string, symbol: string): Promise<VenueResul
     const fundRate = fundArr?.[0] ? safeNum(fundArr[0].fundingRate) : null;
     const oiUsd = oi && lastPrice ? (safeNum(oi.openInterest) ?? 0) * lastPrice : null;
 
-    const pct1h = calcPctChange1hFromKlines(klinesRaw);
-    const rvol = calcRvol24h(klinesRaw);
+    const candles = sortCandles(klinesRaw);
+    const pct1h = calcPctChange1hFromKlines(candles);
+    const rvol = calcRvol24h(candles);
 
     const spread = bidPrice && askPrice ? calcSpreadBps(bidPrice, askPrice) : null;
     const mid = lastPrice ?? ((bidPrice ?? 0) + (askPrice ?? 0)) / 2;
 
-    let depthBid = null, depthAsk = null, depthTotal = null;
-    let slipN1 = null, slipN2 = null;
-
-    if (book && mid > 0) {
-      const bids: [string, string][] = book.bids.map((b: string[]) => [b[0], b[1]] as [string, string]);
-      const asks: [string, string][] = book.asks.map((a: string[]) => [a[0], a[1]] as [string, string]);
-      const d = calcDepth(bids, asks, mid, 1);
-      depthBid = d.bid;
-      depthAsk = d.ask;
-      depthTotal = d.total;
-      slipN1 = calcImpactCost("buy", asks, NOTIONAL_N1, mid);
-      slipN2 = calcImpactCost("buy", asks, NOTIONAL_N2, mid);
-    }
+    const bookMetrics = book && mid > 0
+      ? calcBookMetrics(parseLevels(book.bids), parseLevels(book.asks), mid)
+      : NO_BOOK_METRICS;
 
     return {
       venue, symbol, token,
@@ -184,11 +261,7 @@ async function collectBinance(token: string, symbol: string): Promise<VenueResul
       pct_change_1h: pct1h,
       quote_volume_24h: volume,
       spread_bps: spread,
-      depth_1pct_bid_usdt: depthBid,
-      depth_1pct_ask_usdt: depthAsk,
-      depth_1pct_total_usdt: depthTotal,
-      slip_bps_n1: slipN1,
-      slip_bps_n2: slipN2,
+      ...bookMetrics,
       funding_rate: fundRate,
       open_interest_usd: oiUsd,
       rvol_24h: rvol,
@@ -199,38 +272,40 @@ async function collectBinance(token: string, symbol: string): Promise<VenueResul
   } catch (e) {
     return {
       venue, symbol, token,
-      last_price: null, pct_change_1h: null, quote_volume_24h: null,
-      spread_bps: null, depth_1pct_bid_usdt: null, depth_1pct_ask_usdt: null,
-      depth_1pct_total_usdt: null, slip_bps_n1: null, slip_bps_n2: null,
-      funding_rate: null, open_interest_usd: null, rvol_24h: null,
-      error_type: "fetch_error", error_msg: String(e), raw_json: null,
+      ...EMPTY_METRICS,
+      error_type: errorType(e), error_msg: String(e), raw_json: null,
     };
   }
 }
 
 async function collectOkx(token: string, instId: string): Promise<VenueResult> {
   const venue = "okx";
+  const signal = AbortSignal.timeout(VENUE_TIMEOUT_MS);
   const symbol = instId;
 
   const baseUrls = ["https://app.okx.com", "https://www.okx.com", "https://my.okx.com"];
   let base = baseUrls[0];
+  // The instrument returned by the host probe also carries ctVal/ctMult, so it is kept
+  // rather than fetched a second time below.
+  let inst = null;
   for (const url of baseUrls) {
     try {
-      const verifyRes = await fetch(`${url}/api/v5/public/instruments?instType=SWAP&instId=${instId}`);
+      const verifyRes = await fetch(`${url}/api/v5/public/instruments?instType=SWAP&instId=${instId}`, {
+        signal: AbortSignal.any([signal, AbortSignal.timeout(OKX_PROBE_TIMEOUT_MS)]),
+      });
       if (verifyRes.ok) {
         const data = await verifyRes.json();
-        if (data?.data?.length > 0) { base = url; break; }
+        if (data?.data?.length > 0) { base = url; inst = data.data[0]; break; }
       }
     } catch (_) { continue; }
   }
 
   try {
-    const [tickerRes, bookRes, fundRes, instRes, klinesRes] = await Promise.all([
-      fetch(`${base}/api/v5/market/ticker?instId=${instId}`),
-      fetch(`${base}/api/v5/market/books?instId=${instId}&sz=200`),
-      fetch(`${base}/api/v5/public/funding-rate?instId=${instId}`),
-      fetch(`${base}/api/v5/public/instruments?instType=SWAP&instId=${instId}`),
-      fetch(`${base}/api/v5/market/candles?instId=${instId}&bar=1H&limit=26`),
+    const [tickerRes, bookRes, fundRes, klinesRes] = await Promise.all([
+      fetch(`${base}/api/v5/market/ticker?instId=${instId}`, { signal }),
+      fetch(`${base}/api/v5/market/books?instId=${instId}&sz=200`, { signal }),
+      fetch(`${base}/api/v5/public/funding-rate?instId=${instId}`, { signal }),
+      fetch(`${base}/api/v5/market/candles?instId=${instId}&bar=1H&limit=26`, { signal }),
     ]);
 
     if (!tickerRes.ok) throw new Error(`ticker ${tickerRes.status}`);
@@ -240,8 +315,6 @@ async function collectOkx(token: string, instId: string): Promise<VenueResult> {
     const t = tickerData.data?.[0];
     if (!t) throw new Error("no ticker data");
 
-    const instData = instRes.ok ? await instRes.json() : null;
-    const inst = instData?.data?.[0];
     const ctVal = inst ? (Number(inst.ctVal) * Number(inst.ctMult || 1)) : 1;
 
     const bookData = bookRes.ok ? await bookRes.json() : null;
@@ -249,7 +322,7 @@ async function collectOkx(token: string, instId: string): Promise<VenueResult> {
     const fundData = fundRes.ok ? await fundRes.json() : null;
     const fund = fundData?.data?.[0];
     const klinesRaw = klinesRes.ok ? await klinesRes.json() : null;
-    const candles = klinesRaw?.data ? [...klinesRaw.data].reverse() : null;
+    const candles = sortCandles(klinesRaw?.data ?? null);
 
     const lastPrice = safeNum(t.last);
     const bidPrice = safeNum(t.bidPx);
@@ -263,23 +336,13 @@ async function collectOkx(token: string, instId: string): Promise<VenueResult> {
     const pct1h = calcPctChange1hFromKlines(candles);
     const rvol = calcRvol24h(candles);
 
-    let depthBid = null, depthAsk = null, depthTotal = null;
-    let slipN1 = null, slipN2 = null;
-
-    if (book && mid > 0) {
-      const bids: [string, string][] = book.bids.map((b: string[]) => [b[0], String(Number(b[1]) * ctVal)] as [string, string]);
-      const asks: [string, string][] = book.asks.map((a: string[]) => [a[0], String(Number(a[1]) * ctVal)] as [string, string]);
-      const d = calcDepth(bids, asks, mid, 1);
-      depthBid = d.bid;
-      depthAsk = d.ask;
-      depthTotal = d.total;
-      slipN1 = calcImpactCost("buy", asks, NOTIONAL_N1, mid);
-      slipN2 = calcImpactCost("buy", asks, NOTIONAL_N2, mid);
-    }
+    const bookMetrics = book && mid > 0
+      ? calcBookMetrics(parseLevels(book.bids, ctVal), parseLevels(book.asks, ctVal), mid)
+      : NO_BOOK_METRICS;
 
     let oiUsd = null;
     try {
-      const oiRes = await fetch(`${base}/api/v5/public/open-interest?instType=SWAP&instId=${instId}`);
+      const oiRes = await fetch(`${base}/api/v5/public/open-interest?instType=SWAP&instId=${instId}`, { signal });
       if (oiRes.ok) {
         const oiData = await oiRes.json();
         if (oiData?.data?.[0]) oiUsd = safeNum(oiData.data[0].oiUsd);
@@ -292,11 +355,7 @@ async function collectOkx(token: string, instId: string): Promise<VenueResult> {
       pct_change_1h: pct1h,
       quote_volume_24h: volume,
       spread_bps: spread,
-      depth_1pct_bid_usdt: depthBid,
-      depth_1pct_ask_usdt: depthAsk,
-      depth_1pct_total_usdt: depthTotal,
-      slip_bps_n1: slipN1,
-      slip_bps_n2: slipN2,
+      ...bookMetrics,
       funding_rate: fundRate,
       open_interest_usd: oiUsd,
       rvol_24h: rvol,
@@ -307,23 +366,21 @@ async function collectOkx(token: string, instId: string): Promise<VenueResult> {
   } catch (e) {
     return {
       venue, symbol, token,
-      last_price: null, pct_change_1h: null, quote_volume_24h: null,
-      spread_bps: null, depth_1pct_bid_usdt: null, depth_1pct_ask_usdt: null,
-      depth_1pct_total_usdt: null, slip_bps_n1: null, slip_bps_n2: null,
-      funding_rate: null, open_interest_usd: null, rvol_24h: null,
-      error_type: "fetch_error", error_msg: String(e), raw_json: null,
+      ...EMPTY_METRICS,
+      error_type: errorType(e), error_msg: String(e), raw_json: null,
     };
   }
 }
 
 async function collectBybit(token: string, symbol: string): Promise<VenueResult> {
   const venue = "bybit";
+  const signal = AbortSignal.timeout(VENUE_TIMEOUT_MS);
   try {
     const [tickerRes, bookRes, fundRes, klinesRes] = await Promise.all([
-      fetch(`https://api.bybit.com/v5/market/tickers?category=linear&symbol=${symbol}`),
-      fetch(`https://api.bybit.com/v5/market/orderbook?category=linear&symbol=${symbol}&limit=500`),
-      fetch(`https://api.bybit.com/v5/market/funding/history?category=linear&symbol=${symbol}&limit=1`),
-      fetch(`https://api.bybit.com/v5/market/kline?category=linear&symbol=${symbol}&interval=60&limit=26`),
+      fetch(`https://api.bybit.com/v5/market/tickers?category=linear&symbol=${symbol}`, { signal }),
+      fetch(`https://api.bybit.com/v5/market/orderbook?category=linear&symbol=${symbol}&limit=500`, { signal }),
+      fetch(`https://api.bybit.com/v5/market/funding/history?category=linear&symbol=${symbol}&limit=1`, { signal }),
+      fetch(`https://api.bybit.com/v5/market/kline?category=linear&symbol=${symbol}&interval=60&limit=26`, { signal }),
     ]);
 
     if (!tickerRes.ok) throw new Error(`ticker ${tickerRes.status}`);
@@ -338,7 +395,7 @@ async function collectBybit(token: string, symbol: string): Promise<VenueResult>
     const fundData = fundRes.ok ? await fundRes.json() : null;
     const fund = fundData?.result?.list?.[0];
     const klinesRaw = klinesRes.ok ? await klinesRes.json() : null;
-    const candles = klinesRaw?.result?.list ? [...klinesRaw.result.list].reverse() : null;
+    const candles = sortCandles(klinesRaw?.result?.list ?? null);
 
     const lastPrice = safeNum(t.lastPrice);
     const bidPrice = safeNum(t.bid1Price);
@@ -352,19 +409,9 @@ async function collectBybit(token: string, symbol: string): Promise<VenueResult>
     const pct1h = calcPctChange1hFromKlines(candles);
     const rvol = calcRvol24h(candles);
 
-    let depthBid = null, depthAsk = null, depthTotal = null;
-    let slipN1 = null, slipN2 = null;
-
-    if (book && mid > 0) {
-      const bids: [string, string][] = (book.b ?? []).map((b: string[]) => [b[0], b[1]] as [string, string]);
-      const asks: [string, string][] = (book.a ?? []).map((a: string[]) => [a[0], a[1]] as [string, string]);
-      const d = calcDepth(bids, asks, mid, 1);
-      depthBid = d.bid;
-      depthAsk = d.ask;
-      depthTotal = d.total;
-      slipN1 = calcImpactCost("buy", asks, NOTIONAL_N1, mid);
-      slipN2 = calcImpactCost("buy", asks, NOTIONAL_N2, mid);
-    }
+    const bookMetrics = book && mid > 0
+      ? calcBookMetrics(parseLevels(book.b), parseLevels(book.a), mid)
+      : NO_BOOK_METRICS;
 
     return {
       venue, symbol, token,
@@ -372,11 +419,7 @@ async function collectBybit(token: string, symbol: string): Promise<VenueResult>
       pct_change_1h: pct1h,
       quote_volume_24h: volume,
       spread_bps: spread,
-      depth_1pct_bid_usdt: depthBid,
-      depth_1pct_ask_usdt: depthAsk,
-      depth_1pct_total_usdt: depthTotal,
-      slip_bps_n1: slipN1,
-      slip_bps_n2: slipN2,
+      ...bookMetrics,
       funding_rate: fundRate,
       open_interest_usd: oiUsd,
       rvol_24h: rvol,
@@ -387,11 +430,8 @@ async function collectBybit(token: string, symbol: string): Promise<VenueResult>
   } catch (e) {
     return {
       venue, symbol, token,
-      last_price: null, pct_change_1h: null, quote_volume_24h: null,
-      spread_bps: null, depth_1pct_bid_usdt: null, depth_1pct_ask_usdt: null,
-      depth_1pct_total_usdt: null, slip_bps_n1: null, slip_bps_n2: null,
-      funding_rate: null, open_interest_usd: null, rvol_24h: null,
-      error_type: "fetch_error", error_msg: String(e), raw_json: null,
+      ...EMPTY_METRICS,
+      error_type: errorType(e), error_msg: String(e), raw_json: null,
     };
   }
 }
@@ -446,11 +486,6 @@ Deno.serve(async (req: Request) => {
   }
 
   try {
-    const supabase = createClient(
-      Deno.env.get("SUPABASE_URL")!,
-      Deno.env.get("SUPABASE_SERVICE_ROLE_KEY")!
-    );
-
     const cycleStart = new Date().toISOString();
 
     const { data: tokenConfigs, error: tokenErr } = await supabase
@@ -464,7 +499,7 @@ Deno.serve(async (req: Request) => {
     if (configs.length === 0) {
       return new Response(
         JSON.stringify({ ok: true, message: "no enabled tokens", venues: 0, ok_count: 0 }),
-        { headers: { ...corsHeaders, "Content-Type": "application/json" } }
+        { headers: jsonHeaders }
       );
     }
 
@@ -486,23 +521,34 @@ Deno.serve(async (req: Request) => {
     const { error: insertErr } = await supabase.from("metrics_snapshot").insert(rows);
     if (insertErr) throw new Error(`insert metrics: ${insertErr.message}`);
 
-    const { data: blData } = await supabase.from("baselines").select("*");
+    const { data: blData } = await supabase
+      .from("baselines")
+      .select("venue, median_spread_bps, median_depth_total, median_slip_n2");
     const baselineMap = new Map<string, { median_spread_bps: number | null; median_depth_total: number | null; median_slip_n2: number | null }>();
     for (const b of (blData ?? [])) {
       baselineMap.set(b.venue, b);
     }
 
-    for (const r of allResults) {
-      if (r.error_type || !r.last_price) continue;
-      const { data: recent } = await supabase
-        .from("metrics_snapshot")
-        .select("spread_bps, depth_1pct_total_usdt, slip_bps_n2, quote_volume_24h")
-        .eq("venue", r.venue)
-        .eq("token", r.token)
-        .is("error_type", null)
-        .order("ts_utc", { ascending: false })
-        .limit(200);
-
+    // baselines is keyed by venue only; later tokens overwrite earlier ones, as the
+    // per-venue upserts did before they were batched into a single write.
+    const baselineRows = new Map<string, Record<string, unknown>>();
+    const baselineInputs = allResults.filter((r) => !r.error_type && r.last_price);
+    // Each window is an independent top-200 lookup on the (token, venue) index, so they run concurrently.
+    const windows = await Promise.all(
+      baselineInputs.map((r) =>
+        supabase
+          .from("metrics_snapshot")
+          .select("spread_bps, depth_1pct_total_usdt, slip_bps_n2, quote_volume_24h")
+          .eq("venue", r.venue)
+          .eq("token", r.token)
+          .is("error_type", null)
+          .order("ts_utc", { ascending: false })
+          .limit(200)
+      )
+    );
+    for (let i = 0; i < baselineInputs.length; i++) {
+      const r = baselineInputs[i];
+      const recent = windows[i].data;
       if (!recent || recent.length < 3) continue;
 
       const spreads = recent.map((x: { spread_bps: number | null }) => x.spread_bps).filter((v): v is number => v !== null).sort((a, b) => a - b);
@@ -513,7 +559,7 @@ Deno.serve(async (req: Request) => {
       const median = (arr: number[]) => arr.length === 0 ? null : arr[Math.floor(arr.length / 2)];
       const mean = (arr: number[]) => arr.length === 0 ? null : arr.reduce((a, b) => a + b, 0) / arr.length;
 
-      await supabase.from("baselines").upsert({
+      baselineRows.set(r.venue, {
         venue: r.venue,
         updated_at: tsNow,
         sample_count: recent.length,
@@ -521,23 +567,30 @@ Deno.serve(async (req: Request) => {
         median_depth_total: median(depths),
         median_slip_n2: median(slips),
         mean_volume_24h: mean(vols),
-      }, { onConflict: "venue" });
+      });
+    }
+    if (baselineRows.size > 0) {
+      await supabase.from("baselines").upsert([...baselineRows.values()], { onConflict: "venue" });
     }
 
     const alertRows = detectAlerts(allResults, baselineMap);
     if (alertRows.length > 0) {
       const oneHourAgo = new Date(Date.now() - 3600_000).toISOString();
+      const { data: recentAlerts } = await supabase
+        .from("alerts")
+        .select("venue, alert_type")
+        .in("venue", [...new Set(alertRows.map((a) => a.venue))])
+        .gte("ts_utc", oneHourAgo);
+      const seen = new Set((recentAlerts ?? []).map((a: { venue: string; alert_type: string }) => `${a.venue}:${a.alert_type}`));
+      const newAlerts = [];
       for (const a of alertRows) {
-        const { data: existing } = await supabase
-          .from("alerts")
-          .select("id")
-          .eq("venue", a.venue)
-          .eq("alert_type", a.alert_type)
-          .gte("ts_utc", oneHourAgo)
-          .maybeSingle();
-        if (!existing) {
-          await supabase.from("alerts").insert({ ...a, ts_utc: tsNow });
-        }
+        const dedupeKey = `${a.venue}:${a.alert_type}`;
+        if (seen.has(dedupeKey)) continue;
+        seen.add(dedupeKey);
+        newAlerts.push({ ...a, ts_utc: tsNow });
+      }
+      if (newAlerts.length > 0) {
+        await supabase.from("alerts").insert(newAlerts);
       }
     }
 
@@ -568,12 +621,12 @@ Deno.serve(async (req: Request) => {
           error: r.error_msg,
         })),
       }),
-      { headers: { ...corsHeaders, "Content-Type": "application/json" } }
+      { headers: jsonHeaders }
     );
   } catch (e) {
     return new Response(
       JSON.stringify({ ok: false, error: String(e) }),
-      { status: 500, headers: { ...corsHeaders, "Content-Type": "application/json" } }
+      { status: 500, headers: jsonHeaders }
     );
   }
 });
@@ -0,0 +1,18 @@
+/*
+  # Add partial index for successful snapshots
+
+  ## Summary
+  api-history and the collector's baseline window both read the latest
+  successful snapshots per token and venue:
+  `WHERE token = ? AND venue = ? AND error_type IS NULL ORDER BY ts_utc DESC LIMIT n`.
+  With only (token, venue, ts_utc DESC) available, Postgres walks that index and
+  discards error rows one by one. A partial index over error-free rows lets the
+  top-N be read straight off the index.
+
+  ## Changes
+  - metrics_snapshot: add partial index on (token, venue, ts_utc DESC) WHERE error_type IS NULL
+*/
+
+CREATE INDEX IF NOT EXISTS idx_metrics_snapshot_ok_token_venue_ts
+  ON metrics_snapshot (token, venue, ts_utc DESC)
+  WHERE error_type IS NULL;
@@ -0,0 +1,15 @@
+/*
+  # Add severity index on alerts
+
+  ## Summary
+  api-overview counts `critical` alerts in the last 24 hours
+  (`WHERE severity = 'critical' AND ts_utc >= ?`). idx_alerts_ts only covers the
+  time range, so every alert in the window was fetched to check its severity.
+  An index led by severity turns the count into a single index range scan.
+
+  ## Changes
+  - alerts: add index on (severity, ts_utc DESC)
+*/
+
+CREATE INDEX IF NOT EXISTS idx_alerts_severity_ts
+  ON alerts (severity, ts_utc DESC);